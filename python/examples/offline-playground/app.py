@@ -11,10 +11,14 @@
 # 3. Open 'playground.html' in your browser.
 
 import json
+import re
 import time
 import requests
 import sys
+from datetime import datetime, timedelta, timezone
 from db import get_db_connection
+from catalog_snapshot import current_snapshot
+from maintain_usage import MINUTE_RETENTION_DAYS
 from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
 from psycopg2.extras import RealDictCursor 
@@ -79,6 +83,147 @@ def get_block_templates(cur):
         grouped[t].append({'code': row['code'], 'name': row['name']})
     return grouped
 
+# 📊 Usage analytics served from the usage_rollups_* tables (see schema.postgres.sql)
+USAGE_GROUP_COLUMNS = {'wrapper': 'wrapper_code', 'model': 'model_code', 'status': 'status'}
+USAGE_PERCENTILES = (('p50', 0.50), ('p95', 0.95), ('p99', 0.99))
+
+def latency_percentiles(hist, bounds, max_ms):
+    """Estimates percentiles from a latency histogram by interpolating inside the matching bucket."""
+    total = sum(hist)
+    result = {}
+    for name, q in USAGE_PERCENTILES:
+        if not total:
+            result[name] = None
+            continue
+        target = q * total
+        seen = 0
+        for i, count in enumerate(hist):
+            if count and seen + count >= target:
+                lower = bounds[i - 1] if i > 0 else 0
+                cap = max(max_ms, lower)
+                upper = min(bounds[i], cap) if i < len(bounds) else cap
+                result[name] = round(lower + (upper - lower) * (target - seen) / count)
+                break
+            seen += count
+    return result
+
+def parse_usage_time(value, name):
+    """Parses an ISO 8601 timestamp from the query string. Naive timestamps are taken as UTC."""
+    text = value.strip()
+    if text[-1:] in ('Z', 'z'):
+        text = text[:-1] + '+00:00'
+    # An unencoded '+' in the query string arrives as a space
+    text = re.sub(r'(T[\d:.]+) (\d{2}:?\d{2})$', r'\1+\2', text)
+    # Python < 3.11 only accepts offsets written as +HH:MM
+    text = re.sub(r'(T[\d:.]+[+-]\d{2})(\d{2})$', r'\1:\2', text)
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        raise ValueError(f"Invalid '{name}' timestamp: {value!r}. Use ISO 8601, e.g. 2026-10-01T00:00:00Z.")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+def parse_usage_window(start=None, end=None, group_by=None):
+    """
+    Validates the get_usage_stats arguments and returns (start_at, end_at).
+    Raises ValueError for bad timestamps, an empty window or an unknown group_by.
+    """
+    end_at = parse_usage_time(end, 'to') if end else datetime.now(timezone.utc)
+    start_at = parse_usage_time(start, 'from') if start else end_at - timedelta(hours=24)
+    if start_at >= end_at:
+        raise ValueError("'from' must be earlier than 'to'.")
+    if group_by and group_by not in USAGE_GROUP_COLUMNS:
+        raise ValueError(f"Invalid 'group_by': {group_by!r}. Use one of: {', '.join(USAGE_GROUP_COLUMNS)}.")
+    return start_at, end_at
+
+def get_usage_stats(cur, start_at, end_at, wrapper_code=None, model_code=None, group_by=None):
+    """
+    Aggregates the usage rollups between two datetimes from parse_usage_window(). The window
+    is widened to whole rollup buckets; the response's 'from'/'to' are the bounds actually used.
+    """
+    # Minute precision for recent windows up to a day long. Longer windows, and
+    # anything reaching back past the minute rollups' retention, use hourly rollups.
+    recent = start_at >= datetime.now(timezone.utc) - timedelta(days=MINUTE_RETENTION_DAYS)
+    granularity = 'minute' if recent and (end_at - start_at).total_seconds() <= 86400 else 'hour'
+
+    # Widen to whole buckets (truncated like the rollups) so the edge buckets match the reported bounds
+    cur.execute("""
+        SELECT date_trunc(%(g)s, %(start)s::timestamptz) AS start_at,
+               CASE WHEN date_trunc(%(g)s, %(end)s::timestamptz) = %(end)s::timestamptz THEN %(end)s::timestamptz
+                    ELSE date_trunc(%(g)s, %(end)s::timestamptz) + ('1 ' || %(g)s)::interval END AS end_at,
+               usage_latency_bounds() AS bounds
+    """, {'g': granularity, 'start': start_at, 'end': end_at})
+    window = cur.fetchone()
+    start_at, end_at, bounds = window['start_at'], window['end_at'], window['bounds']
+
+    group_col = USAGE_GROUP_COLUMNS.get(group_by)
+    select_key = f"{group_col} AS key, " if group_col else ""
+    where = ["bucket >= %s", "bucket < %s"]
+    params = [start_at, end_at]
+    if wrapper_code:
+        where.append("wrapper_code = %s")
+        params.append(wrapper_code)
+    if model_code:
+        where.append("model_code = %s")
+        params.append(model_code)
+
+    cur.execute(f"""
+        SELECT {select_key}
+               SUM(calls)::bigint AS calls,
+               COALESCE(SUM(calls) FILTER (WHERE status <> 'success'), 0)::bigint AS errors,
+               SUM(prompt_tokens)::bigint AS prompt_tokens,
+               SUM(completion_tokens)::bigint AS completion_tokens,
+               SUM(total_tokens)::bigint AS total_tokens,
+               SUM(credits_used)::bigint AS credits_used,
+               SUM(latency_sum_ms)::bigint AS latency_sum_ms,
+               MAX(latency_max_ms) AS latency_max_ms,
+               usage_hist_sum(latency_hist) AS latency_hist
+        FROM usage_rollups_{granularity}
+        WHERE {' AND '.join(where)}
+        {f"GROUP BY {group_col} ORDER BY credits_used DESC" if group_col else ""}
+    """, params)
+
+    rows = []
+    for row in cur.fetchall():
+        calls = row['calls'] or 0
+        stats = {
+            'calls': calls,
+            'errors': row['errors'] or 0,
+            'prompt_tokens': row['prompt_tokens'] or 0,
+            'completion_tokens': row['completion_tokens'] or 0,
+            'total_tokens': row['total_tokens'] or 0,
+            'credits_used': row['credits_used'] or 0,
+            'latency_avg_ms': round(row['latency_sum_ms'] / calls) if calls else None,
+            'latency_max_ms': row['latency_max_ms'],
+        }
+        stats.update(latency_percentiles(row['latency_hist'] or [], bounds, row['latency_max_ms'] or 0))
+        if group_col:
+            stats = {group_by: row['key'], **stats}
+        rows.append(stats)
+
+    response = {
+        'from': start_at.isoformat(),
+        'to': end_at.isoformat(),
+        'granularity': granularity,
+    }
+    if group_col:
+        response['groups'] = rows
+    else:
+        response.update(rows[0])
+    return response
+
+# ⚡ Catalog lookups served from the memory-mapped snapshot (see catalog_snapshot.py)
+SNAPSHOT_ACTIONS = {
+    'get_categories': lambda snap, args: snap.get_categories(),
+    'get_use_cases': lambda snap, args: snap.get_use_cases(args.get('category')),
+    'get_wrappers': lambda snap, args: snap.get_wrappers_by_use_case(args.get('usecase')),
+    'get_languages': lambda snap, args: snap.get_languages(),
+    'get_ai_models': lambda snap, args: snap.get_ai_models(),
+    'get_block_templates': lambda snap, args: snap.get_block_templates(),
+    'get_schema': lambda snap, args: snap.get_schema_by_wrapper(args.get('wrapper')),
+}
+
 # ✅ HYBRID PROXY EXECUTION
 def execute_zywrap_proxy(api_key, model, wrapper_code, prompt, language=None, variables={}, overrides={}):
     payload_data = {
@@ -136,6 +281,19 @@ def execute_zywrap_proxy(api_key, model, wrapper_code, prompt, language=None, va
 # --- API Router ---
 @app.route('/api', methods=['GET', 'POST'])
 def api_router():
+    # Catalog reads don't need the database while a snapshot is available
+    if request.method == 'GET' and request.args.get('action') in SNAPSHOT_ACTIONS:
+        snapshot = current_snapshot()
+        if snapshot:
+            return jsonify(SNAPSHOT_ACTIONS[request.args.get('action')](snapshot, request.args))
+
+    # Bad usage stats arguments are rejected before opening a connection
+    if request.method == 'GET' and request.args.get('action') == 'get_usage_stats':
+        try:
+            usage_window = parse_usage_window(request.args.get('from'), request.args.get('to'), request.args.get('group_by'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
     conn = get_db_connection()
     try:
         with conn.cursor(cursor_factory=RealDictCursor) as cur:
@@ -149,6 +307,14 @@ def api_router():
                 if action == 'get_ai_models': return jsonify(get_ai_models(cur))
                 if action == 'get_block_templates': return jsonify(get_block_templates(cur))
                 if action == 'get_schema': return jsonify(get_schema_by_wrapper(cur, request.args.get('wrapper')))
+                if action == 'get_usage_stats':
+                    return jsonify(get_usage_stats(
+                        cur,
+                        *usage_window,
+                        request.args.get('wrapper'),
+                        request.args.get('model'),
+                        request.args.get('group_by')
+                    ))
 
             if request.method == 'POST':
                 input_data = request.get_json()
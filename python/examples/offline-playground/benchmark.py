@@ -0,0 +1,284 @@
+
+# FILE: benchmark.py
+# USAGE: python benchmark.py --data bench-data --output results.json
+# Measures full import (import.py), delta apply (zywrap-sync.py) and catalog reads, both from
+# the database (app.py) and from the catalog snapshot (catalog_snapshot.py), against the data
+# written by generate_bundle.py. Each phase runs in a fresh process so wall time, peak RSS
+# and rows per second are reported per phase.
+#
+# The database configured in db.py is TRUNCATED by the import phase. Use a scratch database.
+# Catalog snapshots go to <data>/catalog-snapshots, never the app's own snapshot directory.
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+import urllib.request
+from datetime import datetime, timezone
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PHASES = ['import', 'delta', 'reads', 'snapshot']
+
+def load_script(file_name, module_name):
+    """Loads one of the example scripts by path (import.py and zywrap-sync.py aren't importable by name)."""
+    if HERE not in sys.path: sys.path.insert(0, HERE)
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(HERE, file_name))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def use_bench_snapshots(data_dir, enabled):
+    """Points catalog_snapshot (as imported by import.py / zywrap-sync.py) at the benchmark's own directory."""
+    if HERE not in sys.path: sys.path.insert(0, HERE)
+    import catalog_snapshot
+    catalog_snapshot.SNAPSHOT_DIR = os.path.join(data_dir, 'catalog-snapshots')
+    catalog_snapshot.ENABLED = enabled
+    return catalog_snapshot
+
+def time_snapshot_write(catalog_snapshot):
+    """Writes one snapshot of the current catalog and returns the seconds it took."""
+    from db import get_db_connection
+    catalog_snapshot.ENABLED = True
+    conn = get_db_connection()
+    try:
+        start = time.perf_counter()
+        catalog_snapshot.write_snapshot(conn)
+        return time.perf_counter() - start
+    finally:
+        conn.close()
+
+def get_data_version():
+    from db import get_db_connection
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT setting_value FROM settings WHERE setting_key = 'data_version'")
+            result = cur.fetchone()
+            return result[0] if result else ''
+    finally:
+        conn.close()
+
+# --- PHASES (each runs in its own child process) ---
+
+def run_import(data_dir, manifest, args):
+    # Snapshot writing is timed on its own, not as part of the import
+    catalog_snapshot = use_bench_snapshots(data_dir, enabled=False)
+    import_module = load_script('import.py', 'import_script')
+    os.chdir(data_dir)
+    start = time.perf_counter()
+    import_module.main()
+    elapsed = time.perf_counter() - start
+    if get_data_version() != manifest['baseVersion']:
+        raise RuntimeError("import.py did not finish; see its output above.")
+    snapshot_seconds = time_snapshot_write(catalog_snapshot)
+    return {'rows': sum(manifest['bundleRows'].values()), 'seconds': elapsed, 'snapshot_seconds': round(snapshot_seconds, 3)}
+
+def run_delta(data_dir, manifest, args):
+    # Otherwise every patch would also rebuild the whole snapshot
+    catalog_snapshot = use_bench_snapshots(data_dir, enabled=False)
+    sync = load_script('zywrap-sync.py', 'zywrap_sync')
+    sync.ZYWRAP_API_ENDPOINT = args.endpoint
+    if get_data_version() != manifest['baseVersion']:
+        raise RuntimeError(f"Database is not at {manifest['baseVersion']}; run the import phase first.")
+    start = time.perf_counter()
+    for _ in manifest['patches']:
+        sync.main()
+    elapsed = time.perf_counter() - start
+    if get_data_version() != manifest['latestVersion']:
+        raise RuntimeError("zywrap-sync.py did not apply every patch; see its output above.")
+    snapshot_seconds = time_snapshot_write(catalog_snapshot)
+    return {'rows': sum(p['rows'] for p in manifest['patches']), 'seconds': elapsed, 'patches': len(manifest['patches']),
+            'snapshot_seconds': round(snapshot_seconds, 3)}
+
+def run_reads(data_dir, manifest, args):
+    app = load_script('app.py', 'app')
+    from db import get_db_connection
+    from psycopg2.extras import RealDictCursor
+    conn = get_db_connection()
+    try:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute("SELECT code, use_case_code FROM wrappers WHERE status = TRUE ORDER BY random() LIMIT %s", (args.reads,))
+            sample = cur.fetchall()
+            returned = 0
+            start = time.perf_counter()
+            returned += len(app.get_categories(cur)) + len(app.get_languages(cur)) + len(app.get_ai_models(cur))
+            returned += sum(len(v) for v in app.get_block_templates(cur).values())
+            for row in sample:
+                if app.get_schema_by_wrapper(cur, row['code']) is not None: returned += 1
+                returned += len(app.get_wrappers_by_use_case(cur, row['use_case_code']))
+            elapsed = time.perf_counter() - start
+    finally:
+        conn.close()
+    return {'rows': returned, 'seconds': elapsed, 'lookups': len(sample) * 2 + 4}
+
+def run_snapshot(data_dir, manifest, args):
+    from db import get_db_connection
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT code, use_case_code FROM wrappers WHERE status = TRUE ORDER BY random() LIMIT %s", (args.reads,))
+            sample = cur.fetchall()
+    finally:
+        conn.close()
+
+    catalog_snapshot = use_bench_snapshots(data_dir, enabled=True)
+    start = time.perf_counter()
+    snap = catalog_snapshot.open_current_snapshot()
+    open_ms = (time.perf_counter() - start) * 1000
+    if snap is None:
+        raise RuntimeError("No catalog snapshot found; run the import phase first.")
+    returned = len(snap.get_categories()) + len(snap.get_languages()) + len(snap.get_ai_models())
+    returned += sum(len(v) for v in snap.get_block_templates().values())
+    for code, use_case_code in sample:
+        if snap.get_schema_by_wrapper(code) is not None: returned += 1
+        returned += len(snap.get_wrappers_by_use_case(use_case_code))
+    elapsed = time.perf_counter() - start
+    return {'rows': returned, 'seconds': elapsed, 'lookups': len(sample) * 2 + 4,
+            'open_ms': round(open_ms, 3), 'data_version': snap.data_version}
+
+PHASE_RUNNERS = {'import': run_import, 'delta': run_delta, 'reads': run_reads, 'snapshot': run_snapshot}
+
+def run_child(args):
+    with open(os.path.join(args.data, 'manifest.json'), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    result = PHASE_RUNNERS[args.run_phase](os.path.abspath(args.data), manifest, args)
+    result['peak_rss_mb'] = peak_rss_mb()
+    # Read phases count the rows their lookups returned, so all phases report rows per second
+    result['rows_per_sec'] = round(result['rows'] / result['seconds'], 1) if result['seconds'] else None
+    if 'lookups' in result:
+        result['lookups_per_sec'] = round(result['lookups'] / result['seconds'], 1) if result['seconds'] else None
+    result['seconds'] = round(result['seconds'], 3)
+    with open(args.result_file, 'w', encoding='utf-8') as f:
+        json.dump(result, f)
+
+# --- HARNESS ---
+
+def serves_dataset(port, manifest):
+    """True if the sync endpoint on the port reports this manifest's latestVersion as up to date."""
+    query = urllib.parse.urlencode({'fromVersion': manifest['latestVersion']})
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/v1/sdk/v1/sync?{query}", timeout=5) as response:
+            reply = json.load(response)
+    except (OSError, ValueError):
+        return False
+    return reply.get('mode') == 'NO_UPDATES' and reply.get('newVersion') == manifest['latestVersion']
+
+def start_mock_server(data_dir, port, manifest):
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, 'mock_sync_server.py'), '--data', data_dir, '--port', str(port)],
+        stdout=subprocess.DEVNULL
+    )
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+        except OSError:
+            if server.poll() is not None: break
+            time.sleep(0.1)
+            continue
+        # Whatever answered must be our server, serving this dataset, and still running
+        if serves_dataset(port, manifest) and server.poll() is None:
+            return server
+        server.kill()
+        raise RuntimeError(f"Port {port} is already in use by another server; pass --port to pick another.")
+    server.kill()
+    raise RuntimeError(f"Mock sync server did not start on port {port}.")
+
+def run_phase(phase, args, endpoint):
+    fd, result_file = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    try:
+        cmd = [sys.executable, os.path.abspath(__file__), '--run-phase', phase, '--data', args.data,
+               '--endpoint', endpoint, '--reads', str(args.reads), '--result-file', result_file]
+        proc = subprocess.run(cmd, stdout=None if args.verbose else subprocess.DEVNULL)
+        if proc.returncode != 0:
+            return {'error': f"exited with status {proc.returncode}"}
+        with open(result_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    finally:
+        os.remove(result_file)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark import, delta sync and catalog reads on synthetic data.")
+    parser.add_argument('--data', default='bench-data', help="Directory written by generate_bundle.py")
+    parser.add_argument('--phases', default=','.join(PHASES), help="Comma-separated subset of: " + ', '.join(PHASES))
+    parser.add_argument('--reads', type=int, default=1000, help="Wrappers to sample for the catalog read phase")
+    parser.add_argument('--port', type=int, default=8765, help="Port for the mock sync server")
+    parser.add_argument('--output', help="Write results as JSON to this file")
+    parser.add_argument('--verbose', action='store_true', help="Show the output of the benchmarked scripts")
+    parser.add_argument('--run-phase', choices=PHASES, help=argparse.SUPPRESS)
+    parser.add_argument('--endpoint', help=argparse.SUPPRESS)
+    parser.add_argument('--result-file', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_phase:
+        run_child(args)
+        return
+
+    try:
+        with open(os.path.join(args.data, 'manifest.json'), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        print(f"FATAL: manifest.json not found in '{args.data}'. Run generate_bundle.py first.", file=sys.stderr)
+        sys.exit(1)
+
+    phases = [p.strip() for p in args.phases.split(',') if p.strip()]
+    unknown = [p for p in phases if p not in PHASES]
+    if unknown:
+        print(f"FATAL: Unknown phase(s): {', '.join(unknown)}", file=sys.stderr)
+        sys.exit(1)
+
+    endpoint = f"http://127.0.0.1:{args.port}/v1/sdk/v1/sync"
+    try:
+        server = start_mock_server(args.data, args.port, manifest) if 'delta' in phases else None
+    except RuntimeError as e:
+        print(f"FATAL: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"--- ⏱️  Benchmarking {manifest['bundleRows'].get('wrappers', 0)} wrappers, {len(manifest['patches'])} patches ---")
+    results = {}
+    try:
+        for phase in phases:
+            results[phase] = run_phase(phase, args, endpoint)
+            r = results[phase]
+            if 'error' in r:
+                print(f"❌ {phase:<8} {r['error']}")
+                break
+            extra = f"  (+{r['snapshot_seconds']:.3f} s snapshot write)" if 'snapshot_seconds' in r else ''
+            if 'lookups' in r:
+                extra = f"  ({r['lookups']} lookups, {r['lookups_per_sec']} lookups/s)"
+            print(f"✅ {phase:<8} {r['seconds']:>10.3f} s  {r['peak_rss_mb']:>9.1f} MB peak RSS  {r['rows']:>10} rows  {r['rows_per_sec']:>12} rows/s{extra}")
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'manifest': manifest,
+                'results': results,
+            }, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if any('error' in r for r in results.values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
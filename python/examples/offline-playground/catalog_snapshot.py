@@ -0,0 +1,416 @@
+
+# FILE: catalog_snapshot.py
+# USAGE: python catalog_snapshot.py   (writes a snapshot of the current catalog on demand)
+# A precompiled, memory-mapped binary snapshot of the catalog, so app.py can answer
+# catalog lookups at startup without PostgreSQL or re-parsing zywrap-data.json.
+#
+# Written by import.py and zywrap-sync.py after each successful import/sync, one file
+# per data_version. The 'CURRENT' file in SNAPSHOT_DIR names the snapshot to serve.
+# Both scripts remove CURRENT before committing catalog changes, so until the new
+# snapshot is written (or if writing it fails) app.py reads from the database.
+# zywrap-sync.py writes a missing or out-of-date snapshot again on its next run.
+#
+# File layout (all integers little-endian):
+#   header              magic, format version, (offset, length) of each section below
+#   meta                JSON: data_version, categories, languages, AI models, block templates
+#   wrappers            fixed-size records for active wrappers, sorted by code (UTF-8 bytes)
+#   use_cases           fixed-size records for all use cases, sorted by code (UTF-8 bytes)
+#   use_case_wrappers   u32 wrapper record indexes, grouped by use case, in display order
+#   category_use_cases  u32 use case record indexes, grouped by category, in display order
+#   strings             UTF-8 heap for codes, names and raw schema_data JSON
+#
+# Records point into the string heap, so opening a snapshot only decodes the header and
+# meta; everything else is read from the mapped pages on demand. The pages come from the
+# OS page cache and are shared by every worker process that maps the same file.
+
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+
+SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'catalog-snapshots')
+CURRENT_FILE = 'CURRENT'
+KEEP_SNAPSHOTS = 3
+STALE_TMP_SECONDS = 3600   # Unfinished *.tmp files older than this are removed when pruning
+ENABLED = True      # write_snapshot() is a no-op when False (benchmark.py times it separately)
+
+MAGIC = b'ZYWSNAP\x00'
+FORMAT_VERSION = 1
+SECTIONS = ('meta', 'wrappers', 'use_cases', 'use_case_wrappers', 'category_use_cases', 'strings')
+HEADER = struct.Struct('<8sI4x' + 'QQ' * len(SECTIONS))
+
+# code (off, len), name (off, len), use case record index (-1 if none), flags
+WRAPPER_REC = struct.Struct('<QIQIiB')
+# code (off, len), name (off, len), schema_data (off, len), flags, wrapper range (start, count)
+USE_CASE_REC = struct.Struct('<QIQIQIBII')
+INDEX = struct.Struct('<I')
+
+FLAG_FEATURED = 1
+FLAG_BASE = 2
+FLAG_ACTIVE = 1
+FLAG_HAS_SCHEMA = 2
+
+class SnapshotError(Exception):
+    """Raised when a snapshot file is missing, truncated or of an unknown format."""
+    pass
+
+# --- WRITING ---
+
+class _StringHeap:
+    def __init__(self):
+        self.data = bytearray()
+
+    def add(self, value):
+        raw = (value or '').encode('utf-8')
+        offset = len(self.data)
+        self.data += raw
+        return offset, len(raw)
+
+def snapshot_file_name(data_version):
+    safe = re.sub(r'[^A-Za-z0-9._-]', '_', data_version or '') or 'unversioned'
+    return f"catalog-{safe}.snap"
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return float('inf')
+
+def _replace_atomically(path, chunks):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try: os.remove(tmp_path)
+        except OSError: pass
+        raise
+
+def build_snapshot(conn):
+    """
+    Reads the catalog from PostgreSQL and returns (data_version, chunks), where chunks are
+    the header followed by each encoded section, ready to be written out in order.
+    """
+    strings = _StringHeap()
+    # One consistent view of the catalog across all the queries below
+    with conn.cursor() as cur:
+        cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+
+        cur.execute("SELECT setting_value FROM settings WHERE setting_key = 'data_version'")
+        result = cur.fetchone()
+        meta = {'data_version': result[0] if result else '', 'format': FORMAT_VERSION}
+
+        cur.execute("SELECT code, name, status FROM categories ORDER BY ordering ASC")
+        categories = cur.fetchall()
+        meta['categories'] = [{'code': c, 'name': n} for c, n, status in categories if status]
+
+        cur.execute("SELECT code, name FROM languages WHERE status = TRUE ORDER BY ordering ASC")
+        meta['languages'] = [{'code': c, 'name': n} for c, n in cur.fetchall()]
+
+        cur.execute("SELECT code, name FROM ai_models WHERE status = TRUE ORDER BY ordering ASC")
+        meta['ai_models'] = [{'code': c, 'name': n} for c, n in cur.fetchall()]
+
+        cur.execute("SELECT type, code, name FROM block_templates WHERE status = TRUE ORDER BY type, name ASC")
+        templates = {}
+        for t, c, n in cur.fetchall():
+            templates.setdefault(t, []).append({'code': c, 'name': n})
+        meta['block_templates'] = templates
+
+        # Use cases, byte-ordered by code so lookups can binary search the records
+        cur.execute("""
+            SELECT code, name, status, schema_data::text
+            FROM use_cases
+            ORDER BY code COLLATE "C"
+        """)
+        use_cases = []
+        use_case_index = {}
+        for code, name, status, schema_text in cur.fetchall():
+            use_case_index[code] = len(use_cases)
+            flags = (FLAG_ACTIVE if status else 0) | (FLAG_HAS_SCHEMA if schema_text is not None else 0)
+            use_cases.append((strings.add(code), strings.add(name), strings.add(schema_text), flags))
+
+        cur.execute("""
+            SELECT category_code, code
+            FROM use_cases
+            WHERE status = TRUE AND category_code IS NOT NULL
+            ORDER BY category_code, ordering ASC
+        """)
+        category_use_cases = bytearray()
+        category_ranges = {}
+        for position, (category_code, code) in enumerate(cur.fetchall()):
+            start, count = category_ranges.get(category_code, (position, 0))
+            category_ranges[category_code] = (start, count + 1)
+            category_use_cases += INDEX.pack(use_case_index[code])
+        meta['category_use_cases'] = category_ranges
+
+    # Wrappers can number in the millions, so stream them through server-side cursors
+    wrappers = bytearray()
+    wrapper_count = 0
+    with conn.cursor(name='snapshot_wrappers') as cur:
+        cur.itersize = 10000
+        cur.execute("""
+            SELECT code, name, use_case_code, featured, base
+            FROM wrappers
+            WHERE status = TRUE
+            ORDER BY code COLLATE "C"
+        """)
+        for code, name, use_case_code, featured, base in cur:
+            flags = (FLAG_FEATURED if featured else 0) | (FLAG_BASE if base else 0)
+            code_ref, name_ref = strings.add(code), strings.add(name)
+            wrappers += WRAPPER_REC.pack(*code_ref, *name_ref, use_case_index.get(use_case_code, -1), flags)
+            wrapper_count += 1
+
+    # Same record numbering as above, regrouped by use case in display order
+    use_case_wrappers = bytearray()
+    wrapper_ranges = {}
+    with conn.cursor(name='snapshot_use_case_wrappers') as cur:
+        cur.itersize = 10000
+        cur.execute("""
+            SELECT use_case_code, idx FROM (
+                SELECT use_case_code, ordering, code, ROW_NUMBER() OVER (ORDER BY code COLLATE "C") - 1 AS idx
+                FROM wrappers
+                WHERE status = TRUE
+            ) w
+            WHERE use_case_code IS NOT NULL
+            ORDER BY use_case_code, ordering ASC, code COLLATE "C"
+        """)
+        for position, (use_case_code, idx) in enumerate(cur):
+            start, count = wrapper_ranges.get(use_case_code, (position, 0))
+            wrapper_ranges[use_case_code] = (start, count + 1)
+            use_case_wrappers += INDEX.pack(idx)
+
+    conn.rollback()
+
+    use_case_records = bytearray()
+    for code, (code_ref, name_ref, schema_ref, flags) in zip(use_case_index, use_cases):
+        start, count = wrapper_ranges.get(code, (0, 0))
+        use_case_records += USE_CASE_REC.pack(*code_ref, *name_ref, *schema_ref, flags, start, count)
+
+    meta['counts'] = {'wrappers': wrapper_count, 'use_cases': len(use_cases)}
+    sections = [json.dumps(meta).encode('utf-8'), wrappers, use_case_records,
+                use_case_wrappers, category_use_cases, strings.data]
+
+    table = []
+    offset = HEADER.size
+    for section in sections:
+        table += [offset, len(section)]
+        offset += len(section)
+    # Sections are written as they are rather than joined, so they are never copied
+    return meta['data_version'], [HEADER.pack(MAGIC, FORMAT_VERSION, *table)] + sections
+
+def invalidate_snapshot(directory=None):
+    """Stops serving the CURRENT snapshot. Call it before committing catalog changes."""
+    directory = directory or SNAPSHOT_DIR
+    try:
+        os.remove(os.path.join(directory, CURRENT_FILE))
+    except FileNotFoundError:
+        pass
+
+def write_snapshot(conn, directory=None):
+    """
+    Builds a snapshot for the catalog currently in the database, makes it the CURRENT one
+    and prunes old snapshots. Call it after the import/sync transaction has been committed.
+    Returns the path of the written file, or None if snapshots are disabled.
+    """
+    if not ENABLED:
+        return None
+    directory = directory or SNAPSHOT_DIR
+    invalidate_snapshot(directory)
+    data_version, chunks = build_snapshot(conn)
+
+    os.makedirs(directory, exist_ok=True)
+    file_name = snapshot_file_name(data_version)
+    path = os.path.join(directory, file_name)
+    _replace_atomically(path, chunks)
+    _replace_atomically(os.path.join(directory, CURRENT_FILE), [file_name.encode('utf-8')])
+
+    # Processes that still map a pruned file keep reading it until they reopen
+    old = sorted(
+        (os.path.join(directory, f) for f in os.listdir(directory) if f.endswith('.snap') and f != file_name),
+        key=os.path.getmtime, reverse=True
+    )
+    # Leftovers from writers that were killed; a recent one may still be in progress
+    cutoff = time.time() - STALE_TMP_SECONDS
+    leftovers = [os.path.join(directory, f) for f in os.listdir(directory) if f.endswith('.tmp')]
+    for stale in old[KEEP_SNAPSHOTS - 1:] + [p for p in leftovers if _mtime(p) < cutoff]:
+        try: os.remove(stale)
+        except OSError: pass
+    return path
+
+def ensure_snapshot(conn, directory=None):
+    """
+    Writes a snapshot if CURRENT is missing or was built for another data_version, e.g.
+    because writing it failed after the last import/sync. Returns the path it wrote, or None.
+    """
+    if not ENABLED:
+        return None
+    with conn.cursor() as cur:
+        cur.execute("SELECT setting_value FROM settings WHERE setting_key = 'data_version'")
+        result = cur.fetchone()
+    conn.rollback()
+    data_version = result[0] if result else ''
+
+    snap = open_current_snapshot(directory)
+    if snap is not None:
+        try:
+            if snap.data_version == data_version:
+                return None
+        finally:
+            snap.close()
+    return write_snapshot(conn, directory)
+
+# --- READING ---
+
+class CatalogSnapshot:
+    """Read-only catalog lookups served from a memory-mapped snapshot file."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            try:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise SnapshotError(f"Snapshot '{path}' is empty.")
+
+        if len(self._mm) < HEADER.size:
+            raise SnapshotError(f"Snapshot '{path}' is truncated.")
+        magic, version, *table = HEADER.unpack_from(self._mm)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise SnapshotError(f"Snapshot '{path}' has an unknown format.")
+        self._sections = {name: (table[2 * i], table[2 * i + 1]) for i, name in enumerate(SECTIONS)}
+        if any(off + size > len(self._mm) for off, size in self._sections.values()):
+            raise SnapshotError(f"Snapshot '{path}' is truncated.")
+
+        off, size = self._sections['meta']
+        self._meta = json.loads(self._mm[off:off + size])
+        self.data_version = self._meta['data_version']
+        self._strings = self._sections['strings'][0]
+        self._wrapper_count = self._sections['wrappers'][1] // WRAPPER_REC.size
+        self._use_case_count = self._sections['use_cases'][1] // USE_CASE_REC.size
+
+    def close(self):
+        self._mm.close()
+
+    def _string(self, off, size):
+        start = self._strings + off
+        return self._mm[start:start + size].decode('utf-8')
+
+    def _record(self, section, rec, i):
+        return rec.unpack_from(self._mm, self._sections[section][0] + i * rec.size)
+
+    def _find(self, section, rec, count, code):
+        """Binary search over records sorted by the UTF-8 bytes of their code."""
+        target = code.encode('utf-8')
+        base = self._sections[section][0]
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            code_off, code_len = struct.unpack_from('<QI', self._mm, base + mid * rec.size)
+            start = self._strings + code_off
+            key = self._mm[start:start + code_len]
+            if key < target: lo = mid + 1
+            elif key > target: hi = mid
+            else: return mid
+        return -1
+
+    def _indexes(self, section, start, count):
+        return struct.unpack_from(f'<{count}I', self._mm, self._sections[section][0] + start * INDEX.size)
+
+    # Same results as the matching helpers in app.py
+
+    def get_categories(self):
+        return self._meta['categories']
+
+    def get_use_cases(self, category_code):
+        start, count = self._meta['category_use_cases'].get(category_code or '', (0, 0))
+        results = []
+        for i in self._indexes('category_use_cases', start, count):
+            code_off, code_len, name_off, name_len = self._record('use_cases', USE_CASE_REC, i)[:4]
+            results.append({'code': self._string(code_off, code_len), 'name': self._string(name_off, name_len)})
+        return results
+
+    def get_wrappers_by_use_case(self, use_case_code):
+        i = self._find('use_cases', USE_CASE_REC, self._use_case_count, use_case_code or '')
+        if i < 0: return []
+        start, count = self._record('use_cases', USE_CASE_REC, i)[-2:]
+        results = []
+        for w in self._indexes('use_case_wrappers', start, count):
+            code_off, code_len, name_off, name_len, _, flags = self._record('wrappers', WRAPPER_REC, w)
+            results.append({
+                'code': self._string(code_off, code_len),
+                'name': self._string(name_off, name_len),
+                'featured': bool(flags & FLAG_FEATURED),
+                'base': bool(flags & FLAG_BASE),
+            })
+        return results
+
+    def get_schema_by_wrapper(self, wrapper_code):
+        i = self._find('wrappers', WRAPPER_REC, self._wrapper_count, wrapper_code or '')
+        if i < 0: return None
+        use_case = self._record('wrappers', WRAPPER_REC, i)[4]
+        if use_case < 0: return None
+        *_, schema_off, schema_len, flags, _, _ = self._record('use_cases', USE_CASE_REC, use_case)
+        if not (flags & FLAG_ACTIVE and flags & FLAG_HAS_SCHEMA): return None
+        # schema_data is only decoded when it's actually requested
+        return json.loads(self._string(schema_off, schema_len))
+
+    def get_languages(self):
+        return self._meta['languages']
+
+    def get_ai_models(self):
+        return self._meta['ai_models']
+
+    def get_block_templates(self):
+        return self._meta['block_templates']
+
+def open_current_snapshot(directory=None):
+    """Opens the snapshot named by CURRENT, or returns None if there isn't a usable one."""
+    directory = directory or SNAPSHOT_DIR
+    try:
+        with open(os.path.join(directory, CURRENT_FILE), 'r', encoding='utf-8') as f:
+            file_name = f.read().strip()
+        return CatalogSnapshot(os.path.join(directory, file_name))
+    except (OSError, SnapshotError, ValueError) as e:
+        if not isinstance(e, FileNotFoundError):
+            print(f"Ignoring catalog snapshot: {e}", file=sys.stderr)
+        return None
+
+_current = {'stamp': None, 'snapshot': None}
+
+def current_snapshot(directory=None):
+    """
+    Returns the CURRENT snapshot for this process, reopening it when import/sync has
+    published a new one. Costs one stat() per call once the snapshot is open.
+    """
+    directory = directory or SNAPSHOT_DIR
+    try:
+        st = os.stat(os.path.join(directory, CURRENT_FILE))
+        stamp = (st.st_mtime_ns, st.st_ino, st.st_size)
+    except OSError:
+        stamp = None
+    if stamp != _current['stamp']:
+        _current['stamp'] = stamp
+        _current['snapshot'] = open_current_snapshot(directory) if stamp else None
+    return _current['snapshot']
+
+def main():
+    from db import get_db_connection
+    conn = get_db_connection()
+    try:
+        path = write_snapshot(conn)
+        print(f"✅ Catalog snapshot written: {path}")
+    except Exception as e:
+        print(f"FATAL: Failed to write catalog snapshot: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+
+# FILE: generate_bundle.py
+# USAGE: python generate_bundle.py --wrappers 100000 --churn 0.01 --patches 3 --out bench-data
+# Writes a synthetic 'zywrap-data.json' / 'zywrap-data.zip' bundle plus a series of
+# DELTA_UPDATE patches in the same format as the real Zywrap API, for benchmarking
+# import.py and zywrap-sync.py without a real account bundle.
+
+import argparse
+import json
+import os
+import random
+import sys
+import zipfile
+
+TEMPLATE_TYPES = ['tones', 'styles', 'formattings', 'complexities', 'lengths', 'audienceLevels', 'responseGoals', 'outputTypes']
+WRAPPERS_PER_USE_CASE = 10
+USE_CASES_PER_CATEGORY = 200
+WORDS = ['blog', 'email', 'product', 'summary', 'launch', 'report', 'story', 'outline', 'pitch', 'review',
+         'social', 'landing', 'page', 'campaign', 'guide', 'brief', 'headline', 'caption', 'script', 'newsletter']
+
+def text(rng, n):
+    return ' '.join(rng.choice(WORDS) for _ in range(n))
+
+def make_schema(rng):
+    """A use-case schema in the same req/opt shape the playground renders."""
+    def fields(count):
+        return {f"{rng.choice(WORDS)}{i}": {'p': rng.random() < 0.5, 'd': text(rng, 3)} for i in range(count)}
+    return {'req': fields(rng.randint(1, 4)), 'opt': fields(rng.randint(0, 6))}
+
+def category_code(i): return f"cat_{i:05d}"
+def use_case_code(i): return f"uc_{i:07d}"
+def wrapper_code(i): return f"w_{i:08d}"
+
+def write_tabular(f, key, cols, rows):
+    """Streams one {"cols": [...], "data": [[...], ...]} section, returning the row count."""
+    f.write(f'{json.dumps(key)}:{{"cols":{json.dumps(cols)},"data":[')
+    count = 0
+    for row in rows:
+        if count: f.write(',')
+        f.write(json.dumps(row, separators=(',', ':')))
+        count += 1
+    f.write(']}')
+    return count
+
+class Catalog:
+    """Tracks which synthetic codes exist so patches can update, insert and delete consistently."""
+
+    def __init__(self, rng, wrappers, languages, models):
+        self.rng = rng
+        self.use_cases = max(1, -(-wrappers // WRAPPERS_PER_USE_CASE))
+        self.categories = max(1, -(-self.use_cases // USE_CASES_PER_CATEGORY))
+        self.languages = languages
+        self.models = models
+        self.next_wrapper = wrappers
+        self.alive = bytearray(b'\x01') * wrappers
+
+    def random_wrapper(self):
+        while True:
+            i = self.rng.randrange(self.next_wrapper)
+            if self.alive[i]: return i
+
+    def new_wrapper(self):
+        i = self.next_wrapper
+        self.next_wrapper += 1
+        self.alive.append(1)
+        return i
+
+    def wrapper_use_case(self, i):
+        uc = i // WRAPPERS_PER_USE_CASE
+        return uc if uc < self.use_cases else self.rng.randrange(self.use_cases)
+
+def write_bundle(path, catalog, rng, version):
+    counts = {}
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f'{{"version":{json.dumps(version)},')
+        counts['categories'] = write_tabular(f, 'categories', ['code', 'name', 'ordering'],
+            ([category_code(i), f"Category {i}", i + 1] for i in range(catalog.categories)))
+        f.write(',')
+        counts['useCases'] = write_tabular(f, 'useCases', ['code', 'name', 'desc', 'cat', 'schema', 'ordering'],
+            ([use_case_code(i), text(rng, 3).title(), text(rng, 12), category_code(i // USE_CASES_PER_CATEGORY), make_schema(rng), i + 1]
+             for i in range(catalog.use_cases)))
+        f.write(',')
+        counts['wrappers'] = write_tabular(f, 'wrappers', ['code', 'name', 'desc', 'usecase', 'featured', 'base', 'ordering'],
+            ([wrapper_code(i), text(rng, 4).title(), text(rng, 16), use_case_code(catalog.wrapper_use_case(i)),
+              rng.random() < 0.05, i % WRAPPERS_PER_USE_CASE == 0, i + 1]
+             for i in range(len(catalog.alive))))
+        f.write(',')
+        counts['languages'] = write_tabular(f, 'languages', ['code', 'name'],
+            ([f"l{i:03d}", f"Language {i}"] for i in range(catalog.languages)))
+        f.write(',')
+        counts['aiModels'] = write_tabular(f, 'aiModels', ['code', 'name', 'ordering'],
+            ([f"model-{i:02d}", f"Model {i}", i + 1] for i in range(catalog.models)))
+        f.write(',"templates":{')
+        counts['templates'] = 0
+        for n, type_name in enumerate(TEMPLATE_TYPES):
+            if n: f.write(',')
+            counts['templates'] += write_tabular(f, type_name, ['code', 'name'],
+                ([f"{type_name}_{i:02d}", f"{type_name.title()} {i}"] for i in range(20)))
+        f.write('}}')
+    return counts
+
+def make_patch(catalog, rng, churn, new_version):
+    """Builds one DELTA_UPDATE patch touching roughly `churn` of the wrappers and use cases."""
+    changed = max(1, int(len(catalog.alive) * churn))
+    inserts = changed // 10
+    deletes = changed // 10
+    updates = changed - inserts - deletes
+
+    wrapper_upserts = {}
+    for _ in range(updates):
+        i = catalog.random_wrapper()
+        wrapper_upserts[i] = catalog.wrapper_use_case(i)
+    for _ in range(inserts):
+        i = catalog.new_wrapper()
+        wrapper_upserts[i] = catalog.wrapper_use_case(i)
+    wrapper_deletes = set()
+    for _ in range(deletes):
+        i = catalog.random_wrapper()
+        if i in wrapper_upserts: continue
+        catalog.alive[i] = 0
+        wrapper_deletes.add(i)
+
+    use_case_ids = {rng.randrange(catalog.use_cases) for _ in range(max(1, int(catalog.use_cases * churn)))}
+    category_ids = {rng.randrange(catalog.categories) for _ in range(max(1, int(catalog.categories * churn)))}
+
+    return {
+        'mode': 'DELTA_UPDATE',
+        'newVersion': new_version,
+        'metadata': {
+            'categories': [{'code': category_code(i), 'name': f"Category {i} ({new_version})", 'status': True, 'position': i + 1} for i in sorted(category_ids)],
+            'languages': [],
+            'aiModels': [{'code': f"model-{i:02d}", 'name': f"Model {i}", 'status': True, 'displayOrder': i + 1} for i in range(catalog.models)],
+            'templates': {},
+        },
+        'useCases': {
+            'upserts': [{
+                'code': use_case_code(i), 'name': text(rng, 3).title(), 'description': text(rng, 12),
+                'categoryCode': category_code(i // USE_CASES_PER_CATEGORY), 'schema': make_schema(rng),
+                'status': True, 'displayOrder': i + 1
+            } for i in sorted(use_case_ids)],
+            'deletes': [],
+        },
+        'wrappers': {
+            'upserts': [{
+                'code': wrapper_code(i), 'name': text(rng, 4).title(), 'description': text(rng, 16),
+                'useCaseCode': use_case_code(uc), 'isFeatured': rng.random() < 0.05,
+                'isBaseWrapper': i % WRAPPERS_PER_USE_CASE == 0, 'status': rng.random() > 0.02, 'displayOrder': i + 1
+            } for i, uc in sorted(wrapper_upserts.items())],
+            'deletes': [wrapper_code(i) for i in sorted(wrapper_deletes)],
+        },
+    }
+
+def count_patch_rows(patch):
+    meta = patch['metadata']
+    return (len(meta['categories']) + len(meta['languages']) + len(meta['aiModels'])
+            + sum(len(v) for v in meta['templates'].values())
+            + len(patch['useCases']['upserts']) + len(patch['useCases']['deletes'])
+            + len(patch['wrappers']['upserts']) + len(patch['wrappers']['deletes']))
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Zywrap data bundle and delta patches.")
+    parser.add_argument('--wrappers', type=int, default=10000, help="Number of wrappers in the base bundle")
+    parser.add_argument('--churn', type=float, default=0.01, help="Fraction of wrappers/use cases changed per patch")
+    parser.add_argument('--patches', type=int, default=3, help="Number of DELTA_UPDATE patches to generate")
+    parser.add_argument('--languages', type=int, default=40)
+    parser.add_argument('--models', type=int, default=12)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', default='bench-data', help="Output directory")
+    parser.add_argument('--no-zip', action='store_true', help="Skip writing zywrap-data.zip")
+    args = parser.parse_args()
+
+    if args.wrappers < 1 or not 0 <= args.churn <= 1:
+        print("FATAL: --wrappers must be positive and --churn between 0 and 1.", file=sys.stderr)
+        sys.exit(1)
+
+    rng = random.Random(args.seed)
+    os.makedirs(args.out, exist_ok=True)
+    catalog = Catalog(rng, args.wrappers, args.languages, args.models)
+    # Versions name the dataset, so a server for different data can't be mistaken for this one
+    dataset = f"w{args.wrappers}-c{args.churn:g}-l{args.languages}-m{args.models}-s{args.seed}"
+    versions = [f"synthetic-{dataset}-{n}" for n in range(args.patches + 1)]
+
+    print(f"Generating bundle with {args.wrappers} wrappers...")
+    json_path = os.path.join(args.out, 'zywrap-data.json')
+    counts = write_bundle(json_path, catalog, rng, versions[0])
+    mb_size = round(os.path.getsize(json_path) / 1024 / 1024, 2)
+    print(f"✅ Wrote {json_path} ({mb_size} MB).")
+
+    if not args.no_zip:
+        zip_path = os.path.join(args.out, 'zywrap-data.zip')
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as z:
+            z.write(json_path, 'zywrap-data.json')
+        print(f"✅ Wrote {zip_path}.")
+
+    manifest = {
+        'baseVersion': versions[0],
+        'latestVersion': versions[-1],
+        'bundleRows': counts,
+        'patches': [],
+    }
+    for n in range(1, args.patches + 1):
+        patch = make_patch(catalog, rng, args.churn, versions[n])
+        file_name = f"patch-{n:04d}.json"
+        with open(os.path.join(args.out, file_name), 'w', encoding='utf-8') as f:
+            json.dump(patch, f, separators=(',', ':'))
+        manifest['patches'].append({'fromVersion': versions[n - 1], 'file': file_name, 'rows': count_patch_rows(patch)})
+        print(f"✅ Wrote {file_name} ({versions[n - 1]} -> {versions[n]}, {manifest['patches'][-1]['rows']} rows).")
+
+    with open(os.path.join(args.out, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    print(f"\n✅ Synthetic data ready in '{args.out}'. Latest version: {versions[-1]}")
+
+if __name__ == "__main__":
+    main()
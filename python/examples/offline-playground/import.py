@@ -6,6 +6,7 @@
 import json
 import sys
 from db import get_db_connection
+from catalog_snapshot import invalidate_snapshot, write_snapshot
 
 def extract_tabular(tabular_data):
     """Helper to expand tabular JSON data into dictionaries"""
@@ -101,9 +102,18 @@ def main():
                 )
                 print("Data version saved to settings table.")
             
+            # Until the new snapshot is written, app.py falls back to the database
+            invalidate_snapshot()
             conn.commit()
             print(f"\n✅ v1.0 Import complete! Version: {data.get('version', 'N/A')}")
 
+            try:
+                snapshot_path = write_snapshot(conn)
+                if snapshot_path:
+                    print(f"✅ Catalog snapshot written: {snapshot_path}")
+            except Exception as snap_err:
+                print(f"⚠️ Failed to write catalog snapshot (app.py will read from the database): {snap_err}", file=sys.stderr)
+
     except Exception as e:
         conn.rollback()
         print(f"FATAL: Database error during import.\n{e}", file=sys.stderr)
@@ -0,0 +1,56 @@
+
+# FILE: maintain_usage.py
+# USAGE: python maintain_usage.py [--rollups-only]
+# Rolls up new usage_logs rows, creates upcoming partitions and applies retention.
+# Run it with --rollups-only every minute and without flags once a day (cron jobs).
+
+import argparse
+import sys
+from db import get_db_connection
+
+# --- CONFIGURATION ---
+DAYS_AHEAD = 7                  # Daily partitions to create in advance
+RAW_RETENTION_DAYS = 30         # Raw usage_logs rows (dropped a partition at a time)
+MINUTE_RETENTION_DAYS = 14      # Per-minute rollups (app.py switches to hourly beyond this)
+HOUR_RETENTION_DAYS = 400       # Per-hour rollups
+ROLLUP_SETTLE = '1 minute'      # How long after a minute ends before it is rolled up
+# ---------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Roll up and maintain usage_logs.")
+    parser.add_argument('--rollups-only', action='store_true', help="Only refresh the usage rollups")
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT usage_rollups_refresh(%s::interval)", (ROLLUP_SETTLE,))
+            rolled_up_to = cur.fetchone()[0]
+            conn.commit()
+        print(f"✅ Usage rolled up to {rolled_up_to}.")
+        if args.rollups_only:
+            return
+
+        print("Running usage_logs maintenance...")
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT usage_logs_maintain(%s, make_interval(days => %s), make_interval(days => %s), make_interval(days => %s))",
+                (DAYS_AHEAD, RAW_RETENTION_DAYS, MINUTE_RETENTION_DAYS, HOUR_RETENTION_DAYS)
+            )
+            cur.execute("SELECT COUNT(*) FROM usage_logs_default")
+            stray = cur.fetchone()[0]
+            conn.commit()
+
+        print(f"✅ Partitions ready for the next {DAYS_AHEAD} days. Retention (days): raw {RAW_RETENTION_DAYS}, minute {MINUTE_RETENTION_DAYS}, hour {HOUR_RETENTION_DAYS}.")
+        if stray:
+            print(f"⚠️ {stray} rows are still in usage_logs_default (outside the partitioned range).", file=sys.stderr)
+
+    except Exception as e:
+        conn.rollback()
+        print(f"FATAL: Maintenance failed.\n{e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
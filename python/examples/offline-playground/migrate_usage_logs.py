@@ -0,0 +1,96 @@
+
+# FILE: migrate_usage_logs.py
+# USAGE: python migrate_usage_logs.py
+# One-time migration for databases created before usage_logs was partitioned.
+# Renames the existing table to 'usage_logs_legacy', creates the partitioned table and
+# rollups from schema.postgres.sql, copies the rows that are still within the hourly
+# rollup retention and builds the rollups from them. Stop app.py while it runs.
+
+import os
+import sys
+from db import get_db_connection
+from maintain_usage import DAYS_AHEAD, RAW_RETENTION_DAYS, MINUTE_RETENTION_DAYS, HOUR_RETENTION_DAYS, ROLLUP_SETTLE
+
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schema.postgres.sql')
+SECTION_START = '-- BEGIN usage analytics'
+SECTION_END = '-- END usage analytics'
+
+COLUMNS = "id, trace_id, wrapper_code, model_code, prompt_tokens, completion_tokens, total_tokens, credits_used, latency_ms, status, error_message, created_at"
+
+def read_usage_schema():
+    """Returns the usage analytics section of schema.postgres.sql."""
+    with open(SCHEMA_FILE, 'r', encoding='utf-8') as f:
+        schema = f.read()
+    start, end = schema.find(SECTION_START), schema.find(SECTION_END)
+    if start < 0 or end < start:
+        raise RuntimeError(f"Could not find the usage analytics section in {SCHEMA_FILE}.")
+    return schema[start:end]
+
+def main():
+    print("Migrating usage_logs to the partitioned schema...")
+    usage_schema = read_usage_schema()
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass('usage_logs')")
+            result = cur.fetchone()
+            if not result:
+                print("FATAL: usage_logs not found. Create a new database with schema.postgres.sql instead.", file=sys.stderr)
+                sys.exit(1)
+            if result[0] == 'p':
+                print("✅ usage_logs is already partitioned. Nothing to do.")
+                return
+
+            # 1. Move the old table and everything named after it out of the way
+            cur.execute("""
+                ALTER TABLE usage_logs RENAME TO usage_logs_legacy;
+                ALTER INDEX IF EXISTS usage_logs_pkey RENAME TO usage_logs_legacy_pkey;
+                ALTER INDEX IF EXISTS idx_usage_wrapper RENAME TO idx_usage_legacy_wrapper;
+                ALTER INDEX IF EXISTS idx_usage_model RENAME TO idx_usage_legacy_model;
+                ALTER SEQUENCE IF EXISTS usage_logs_id_seq RENAME TO usage_logs_legacy_id_seq;
+            """)
+
+            # 2. Partitioned table, rollups and functions
+            cur.execute(usage_schema)
+            print("Partitioned usage_logs created.")
+
+            # 3. Daily partitions for the history worth keeping, then the rows themselves
+            cur.execute("""
+                SELECT usage_logs_ensure_partition(day)
+                FROM (
+                    SELECT DISTINCT (created_at AT TIME ZONE 'UTC')::DATE AS day
+                    FROM usage_logs_legacy
+                    WHERE created_at >= NOW() - make_interval(days => %s)
+                ) d
+            """, (HOUR_RETENTION_DAYS,))
+            cur.execute(f"""
+                INSERT INTO usage_logs ({COLUMNS})
+                SELECT {COLUMNS} FROM usage_logs_legacy
+                WHERE created_at >= NOW() - make_interval(days => %s)
+            """, (HOUR_RETENTION_DAYS,))
+            print(f"Copied {cur.rowcount} rows from the last {HOUR_RETENTION_DAYS} days.")
+            cur.execute("""
+                SELECT setval(pg_get_serial_sequence('usage_logs', 'id'),
+                              GREATEST((SELECT MAX(id) FROM usage_logs_legacy), 1))
+            """)
+
+            # 4. Rollups for the copied history, then the usual retention
+            cur.execute("SELECT usage_rollups_refresh(%s::interval)", (ROLLUP_SETTLE,))
+            cur.execute(
+                "SELECT usage_logs_maintain(%s, make_interval(days => %s), make_interval(days => %s), make_interval(days => %s))",
+                (DAYS_AHEAD, RAW_RETENTION_DAYS, MINUTE_RETENTION_DAYS, HOUR_RETENTION_DAYS)
+            )
+
+            conn.commit()
+            print("\n✅ Migration complete. The old rows are kept in 'usage_logs_legacy'.")
+            print("   Once you have checked the new tables, run: DROP TABLE usage_logs_legacy;")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"FATAL: Migration failed, nothing was changed.\n{e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
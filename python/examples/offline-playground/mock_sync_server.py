@@ -0,0 +1,85 @@
+
+# FILE: mock_sync_server.py
+# USAGE: python mock_sync_server.py --data bench-data --port 8765
+# A local stand-in for the Zywrap sync/download API, serving the output of
+# generate_bundle.py. Point zywrap-sync.py at http://localhost:8765/v1/sdk/v1/sync.
+
+import argparse
+import json
+import os
+import sys
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+SYNC_PATH = '/v1/sdk/v1/sync'
+DOWNLOAD_PATH = '/v1/sdk/v1/download'
+
+def make_handler(data_dir, manifest):
+    patches = {p['fromVersion']: p['file'] for p in manifest['patches']}
+
+    class SyncHandler(BaseHTTPRequestHandler):
+        def send_file(self, path, content_type):
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(os.path.getsize(path)))
+            self.end_headers()
+            with open(path, 'rb') as f:
+                while True:
+                    chunk = f.read(1024 * 1024)
+                    if not chunk: break
+                    self.wfile.write(chunk)
+
+        def send_json(self, payload, status=200):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == SYNC_PATH:
+                from_version = parse_qs(url.query).get('fromVersion', [''])[0]
+                if from_version in patches:
+                    self.send_file(os.path.join(data_dir, patches[from_version]), 'application/json')
+                elif from_version == manifest['latestVersion']:
+                    self.send_json({'mode': 'NO_UPDATES', 'newVersion': from_version})
+                else:
+                    host = self.headers.get('Host', f"localhost:{self.server.server_port}")
+                    self.send_json({'mode': 'FULL_RESET', 'wrappers': {'downloadUrl': f"http://{host}{DOWNLOAD_PATH}"}})
+            elif url.path == DOWNLOAD_PATH:
+                self.send_file(os.path.join(data_dir, 'zywrap-data.zip'), 'application/zip')
+            else:
+                self.send_json({'error': 'Not found'}, 404)
+
+        def log_message(self, format, *args):
+            pass
+
+    return SyncHandler
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve generate_bundle.py output as a local Zywrap sync endpoint.")
+    parser.add_argument('--data', default='bench-data', help="Directory written by generate_bundle.py")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    try:
+        with open(os.path.join(args.data, 'manifest.json'), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        print(f"FATAL: manifest.json not found in '{args.data}'. Run generate_bundle.py first.", file=sys.stderr)
+        sys.exit(1)
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args.data, manifest))
+    print(f"Mock Zywrap sync endpoint listening at http://{args.host}:{args.port}{SYNC_PATH}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -56,8 +56,18 @@ CREATE TABLE "settings" (
   "setting_value" TEXT
 );
 
+-- Indexes for performance
+CREATE INDEX idx_use_case_cat ON use_cases(category_code);
+CREATE INDEX idx_wrapper_uc ON wrappers(use_case_code);
+
+-- BEGIN usage analytics
+-- (migrate_usage_logs.py applies this section to databases created before it existed)
+
+-- usage_logs is range-partitioned by day on created_at so old data can be
+-- dropped a whole partition at a time. Partitions are created ahead of time
+-- (and expired) by usage_logs_maintain(), see maintain_usage.py.
 CREATE TABLE "usage_logs" (
-  "id" BIGSERIAL PRIMARY KEY,
+  "id" BIGSERIAL,
   "trace_id" VARCHAR(255),
   "wrapper_code" VARCHAR(255),
   "model_code" VARCHAR(255),
@@ -68,11 +78,222 @@ CREATE TABLE "usage_logs" (
   "latency_ms" INT DEFAULT 0,
   "status" VARCHAR(50) DEFAULT 'success',
   "error_message" TEXT,
-  "created_at" TIMESTAMPTZ DEFAULT NOW()
+  "created_at" TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  PRIMARY KEY ("id", "created_at")
+) PARTITION BY RANGE ("created_at");
+
+-- Catches rows outside every daily partition. It should stay empty as long as
+-- usage_logs_maintain() runs regularly; if it doesn't, the next run moves the
+-- stray rows into their daily partitions.
+CREATE TABLE "usage_logs_default" PARTITION OF "usage_logs" DEFAULT;
+
+-- Pre-aggregated usage, built in batches by usage_rollups_refresh().
+-- Dashboards read from these instead of scanning raw rows.
+CREATE TABLE "usage_rollups_minute" (
+  "bucket" TIMESTAMPTZ NOT NULL,
+  "wrapper_code" VARCHAR(255) NOT NULL DEFAULT '',
+  "model_code" VARCHAR(255) NOT NULL DEFAULT '',
+  "status" VARCHAR(50) NOT NULL DEFAULT '',
+  "calls" BIGINT NOT NULL DEFAULT 0,
+  "prompt_tokens" BIGINT NOT NULL DEFAULT 0,
+  "completion_tokens" BIGINT NOT NULL DEFAULT 0,
+  "total_tokens" BIGINT NOT NULL DEFAULT 0,
+  "credits_used" BIGINT NOT NULL DEFAULT 0,
+  "latency_sum_ms" BIGINT NOT NULL DEFAULT 0,
+  "latency_max_ms" INT NOT NULL DEFAULT 0,
+  "latency_hist" BIGINT[] NOT NULL,
+  PRIMARY KEY ("bucket", "wrapper_code", "model_code", "status")
 );
 
--- Indexes for performance
+CREATE TABLE "usage_rollups_hour" (LIKE "usage_rollups_minute" INCLUDING ALL);
+
+-- Single row: raw usage_logs rows created before `rolled_up_to` are already in the
+-- rollups. NULL means nothing has been rolled up yet.
+CREATE TABLE "usage_rollup_state" (
+  "id" BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK ("id"),
+  "rolled_up_to" TIMESTAMPTZ
+);
+INSERT INTO "usage_rollup_state" ("id", "rolled_up_to") VALUES (TRUE, NULL);
+
+-- Latency histogram bucket boundaries (ms). latency_hist[1] counts calls below
+-- the first bound, latency_hist[n + 1] counts calls at or above the last one.
+CREATE FUNCTION usage_latency_bounds() RETURNS INT[] AS $$
+  SELECT '{25,50,75,100,150,200,300,400,500,750,1000,1500,2000,3000,4000,5000,7500,10000,15000,20000,30000,45000,60000,90000,120000,180000,300000}'::INT[]
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+CREATE FUNCTION usage_hist_accum(state BIGINT[], latency_ms INT) RETURNS BIGINT[] AS $$
+DECLARE
+  idx INT := width_bucket(COALESCE(latency_ms, 0), usage_latency_bounds()) + 1;
+BEGIN
+  state[idx] := state[idx] + 1;
+  RETURN state;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE PARALLEL SAFE;
+
+CREATE FUNCTION usage_hist_add(a BIGINT[], b BIGINT[]) RETURNS BIGINT[] AS $$
+  SELECT array_agg(COALESCE(x, 0) + COALESCE(y, 0) ORDER BY n)
+  FROM unnest(a, b) WITH ORDINALITY AS t(x, y, n)
+$$ LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE;
+
+-- usage_hist_agg(latency_ms) builds a histogram from raw rows,
+-- usage_hist_sum(latency_hist) merges histograms from rollup rows.
+CREATE AGGREGATE usage_hist_agg(INT) (
+  SFUNC = usage_hist_accum,
+  STYPE = BIGINT[],
+  INITCOND = '{0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0}'
+);
+
+CREATE AGGREGATE usage_hist_sum(BIGINT[]) (
+  SFUNC = usage_hist_add,
+  STYPE = BIGINT[],
+  COMBINEFUNC = usage_hist_add,
+  PARALLEL = SAFE
+);
+
+-- Rolls up every closed minute since the last run, reading the raw partitions once
+-- per batch instead of touching the rollups on each logged call. Minutes are only
+-- considered closed `settle` after they end, so in-flight inserts aren't missed.
+-- Hourly rows are rebuilt from the minute rows of each hour the batch touched.
+-- Returns the new rolled_up_to mark.
+CREATE FUNCTION usage_rollups_refresh(settle INTERVAL DEFAULT '1 minute') RETURNS TIMESTAMPTZ AS $$
+DECLARE
+  lo TIMESTAMPTZ;
+  hi TIMESTAMPTZ := date_trunc('minute', NOW() - settle);
+BEGIN
+  -- Row lock serialises concurrent runs
+  SELECT rolled_up_to INTO lo FROM usage_rollup_state FOR UPDATE;
+  IF lo IS NULL THEN
+    SELECT date_trunc('minute', MIN(created_at)) INTO lo FROM usage_logs;
+  END IF;
+  IF lo IS NULL OR lo >= hi THEN
+    UPDATE usage_rollup_state SET rolled_up_to = GREATEST(COALESCE(lo, hi), hi);
+    RETURN GREATEST(COALESCE(lo, hi), hi);
+  END IF;
+
+  INSERT INTO usage_rollups_minute AS r
+    (bucket, wrapper_code, model_code, status, calls, prompt_tokens, completion_tokens, total_tokens, credits_used, latency_sum_ms, latency_max_ms, latency_hist)
+  SELECT date_trunc('minute', created_at), COALESCE(wrapper_code, ''), COALESCE(model_code, ''), COALESCE(status, ''),
+         COUNT(*), COALESCE(SUM(prompt_tokens), 0), COALESCE(SUM(completion_tokens), 0), COALESCE(SUM(total_tokens), 0),
+         COALESCE(SUM(credits_used), 0), COALESCE(SUM(latency_ms), 0), COALESCE(MAX(latency_ms), 0), usage_hist_agg(latency_ms)
+  FROM usage_logs
+  WHERE created_at >= lo AND created_at < hi
+  GROUP BY 1, 2, 3, 4
+  ON CONFLICT (bucket, wrapper_code, model_code, status) DO UPDATE SET
+    calls = r.calls + EXCLUDED.calls,
+    prompt_tokens = r.prompt_tokens + EXCLUDED.prompt_tokens,
+    completion_tokens = r.completion_tokens + EXCLUDED.completion_tokens,
+    total_tokens = r.total_tokens + EXCLUDED.total_tokens,
+    credits_used = r.credits_used + EXCLUDED.credits_used,
+    latency_sum_ms = r.latency_sum_ms + EXCLUDED.latency_sum_ms,
+    latency_max_ms = GREATEST(r.latency_max_ms, EXCLUDED.latency_max_ms),
+    latency_hist = usage_hist_add(r.latency_hist, EXCLUDED.latency_hist);
+
+  INSERT INTO usage_rollups_hour AS r
+    (bucket, wrapper_code, model_code, status, calls, prompt_tokens, completion_tokens, total_tokens, credits_used, latency_sum_ms, latency_max_ms, latency_hist)
+  SELECT date_trunc('hour', bucket), wrapper_code, model_code, status,
+         SUM(calls), SUM(prompt_tokens), SUM(completion_tokens), SUM(total_tokens),
+         SUM(credits_used), SUM(latency_sum_ms), MAX(latency_max_ms), usage_hist_sum(latency_hist)
+  FROM usage_rollups_minute
+  WHERE bucket >= date_trunc('hour', lo) AND bucket < hi
+  GROUP BY 1, 2, 3, 4
+  ON CONFLICT (bucket, wrapper_code, model_code, status) DO UPDATE SET
+    calls = EXCLUDED.calls,
+    prompt_tokens = EXCLUDED.prompt_tokens,
+    completion_tokens = EXCLUDED.completion_tokens,
+    total_tokens = EXCLUDED.total_tokens,
+    credits_used = EXCLUDED.credits_used,
+    latency_sum_ms = EXCLUDED.latency_sum_ms,
+    latency_max_ms = EXCLUDED.latency_max_ms,
+    latency_hist = EXCLUDED.latency_hist;
+
+  UPDATE usage_rollup_state SET rolled_up_to = hi;
+  RETURN hi;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Creates the daily partition for `day` if it doesn't exist yet. Postgres refuses
+-- to add a partition whose range overlaps rows already in usage_logs_default, so
+-- any such rows are moved into the new table before it is attached.
+CREATE FUNCTION usage_logs_ensure_partition(day DATE) RETURNS VOID AS $$
+DECLARE
+  part TEXT := format('usage_logs_p%s', to_char(day, 'YYYYMMDD'));
+  lo TIMESTAMPTZ := day::TIMESTAMP AT TIME ZONE 'UTC';
+  hi TIMESTAMPTZ := (day + 1)::TIMESTAMP AT TIME ZONE 'UTC';
+BEGIN
+  IF to_regclass(part) IS NOT NULL THEN
+    RETURN;
+  END IF;
+
+  IF NOT EXISTS (SELECT 1 FROM usage_logs_default WHERE created_at >= lo AND created_at < hi) THEN
+    EXECUTE format('CREATE TABLE %I PARTITION OF usage_logs FOR VALUES FROM (%L) TO (%L)', part, lo, hi);
+    RETURN;
+  END IF;
+
+  EXECUTE format('CREATE TABLE %I (LIKE usage_logs INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', part);
+  EXECUTE format(
+    'WITH moved AS (DELETE FROM usage_logs_default WHERE created_at >= %L AND created_at < %L RETURNING *) INSERT INTO %I SELECT * FROM moved',
+    lo, hi, part
+  );
+  EXECUTE format('ALTER TABLE usage_logs ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)', part, lo, hi);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Creates the daily partitions for the next `days_ahead` days (plus any past day
+-- still sitting in usage_logs_default) and applies retention: raw partitions older
+-- than `raw_retention` are dropped whole, rollup rows older than their retention
+-- are deleted.
+CREATE FUNCTION usage_logs_maintain(
+  days_ahead INT DEFAULT 7,
+  raw_retention INTERVAL DEFAULT '30 days',
+  minute_retention INTERVAL DEFAULT '14 days',
+  hour_retention INTERVAL DEFAULT '400 days'
+) RETURNS VOID AS $$
+DECLARE
+  today DATE := (NOW() AT TIME ZONE 'UTC')::DATE;
+  cutoff DATE := (NOW() AT TIME ZONE 'UTC' - raw_retention)::DATE;
+  day DATE;
+  part RECORD;
+BEGIN
+  -- Days that fell into the default partition, e.g. while this job wasn't running
+  FOR day IN
+    SELECT DISTINCT (created_at AT TIME ZONE 'UTC')::DATE
+    FROM usage_logs_default
+    WHERE created_at >= cutoff::TIMESTAMP AT TIME ZONE 'UTC'
+  LOOP
+    PERFORM usage_logs_ensure_partition(day);
+  END LOOP;
+
+  FOR i IN 0..days_ahead LOOP
+    PERFORM usage_logs_ensure_partition(today + i);
+  END LOOP;
+
+  FOR part IN
+    SELECT c.relname
+    FROM pg_inherits inh
+    JOIN pg_class c ON c.oid = inh.inhrelid
+    WHERE inh.inhparent = 'usage_logs'::REGCLASS
+      AND c.relname ~ '^usage_logs_p[0-9]{8}$'
+      AND to_date(substring(c.relname FROM 13), 'YYYYMMDD') < cutoff
+  LOOP
+    EXECUTE format('DROP TABLE %I', part.relname);
+  END LOOP;
+  DELETE FROM usage_logs_default WHERE created_at < cutoff::TIMESTAMP AT TIME ZONE 'UTC';
+
+  DELETE FROM usage_rollups_minute WHERE bucket < NOW() - minute_retention;
+  DELETE FROM usage_rollups_hour WHERE bucket < NOW() - hour_retention;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Usage indexes
 CREATE INDEX idx_usage_wrapper ON usage_logs(wrapper_code);
 CREATE INDEX idx_usage_model ON usage_logs(model_code);
-CREATE INDEX idx_use_case_cat ON use_cases(category_code);
-CREATE INDEX idx_wrapper_uc ON wrappers(use_case_code);
+CREATE INDEX idx_usage_created ON usage_logs USING BRIN (created_at);
+CREATE INDEX idx_rollup_minute_wrapper ON usage_rollups_minute(wrapper_code, bucket);
+CREATE INDEX idx_rollup_minute_model ON usage_rollups_minute(model_code, bucket);
+CREATE INDEX idx_rollup_hour_wrapper ON usage_rollups_hour(wrapper_code, bucket);
+CREATE INDEX idx_rollup_hour_model ON usage_rollups_hour(model_code, bucket);
+
+-- Create today's and the coming week's usage_logs partitions
+SELECT usage_logs_maintain();
+
+-- END usage analytics
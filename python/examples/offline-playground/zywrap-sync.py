@@ -3,12 +3,14 @@
 # USAGE: python zywrap-sync.py
 # REQUIREMENTS: pip install requests psycopg2-binary
 
+import json
 import requests
 import sys
 import os
 import zipfile
 import psycopg2.extras 
 from db import get_db_connection
+from catalog_snapshot import ensure_snapshot, invalidate_snapshot, write_snapshot
 
 # --- CONFIGURATION ---
 DEVELOPER_API_KEY = 'YOUR_ZYWRAP_API_KEY_HERE'
@@ -58,6 +60,15 @@ def delete_batch(cur, table, ids, pk='code'):
 
 # --- MAIN LOGIC ---
 
+def refresh_stale_snapshot(conn):
+    """Retries the catalog snapshot if the last one was never written for the current version."""
+    try:
+        snapshot_path = ensure_snapshot(conn)
+        if snapshot_path:
+            print(f"✅ Catalog snapshot written: {snapshot_path}")
+    except Exception as snap_err:
+        print(f"⚠️ Failed to write catalog snapshot (app.py will read from the database): {snap_err}", file=sys.stderr)
+
 def main():
     print("--- 🚀 Starting Zywrap V1 Sync ---")
     conn = get_db_connection()
@@ -112,6 +123,7 @@ def main():
                         import_module = importlib.util.module_from_spec(spec)
                         spec.loader.exec_module(import_module)
                         import_module.main()
+                        refresh_stale_snapshot(conn)
 
                     except Exception as z_err:
                         print("⚠️ Failed to auto-unzip (Check directory permissions).")
@@ -170,10 +182,20 @@ def main():
                 if patch.get('newVersion'):
                     save_new_version(cur, patch['newVersion'])
                 
+                # Until the new snapshot is written, app.py falls back to the database
+                invalidate_snapshot()
                 conn.commit()
                 print("✅ Delta Sync Complete.")
+
+                try:
+                    snapshot_path = write_snapshot(conn)
+                    if snapshot_path:
+                        print(f"✅ Catalog snapshot written: {snapshot_path}")
+                except Exception as snap_err:
+                    print(f"⚠️ Failed to write catalog snapshot (app.py will read from the database): {snap_err}", file=sys.stderr)
             else:
                 print("✅ No updates needed.")
+                refresh_stale_snapshot(conn)
 
     except Exception as e:
         if not conn.closed: